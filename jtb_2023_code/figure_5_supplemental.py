@@ -587,14 +587,14 @@ def _get_fig5_data(data_obj, genes=None):
         "rapamycin_window_decay"
     ]["times"]
 
-    fig3_data.layers["velocity"] = np.full(
+    # The experiment loop below covers every observation, so the layers
+    # don't need a NaN prefill
+    fig3_data.layers["velocity"] = np.empty(
         fig3_data.X.shape,
-        np.nan,
         dtype=np.float32
     )
-    fig3_data.layers["denoised"] = np.full(
+    fig3_data.layers["denoised"] = np.empty(
         fig3_data.X.shape,
-        np.nan,
         dtype=np.float32
     )
     fig3_data.varm["decay"] = data_obj.all_data.varm["rapamycin_window_decay"][
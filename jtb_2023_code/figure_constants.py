@@ -1,3 +1,5 @@
+import typing as _typing
+
 import numpy as _np
 from .utils.figure_filenames import (
     DataFile,
@@ -50,26 +52,37 @@ SUPIRFACTOR_BIOPHYSICAL_MODEL = str(ModelFile("RAPA_BIOPHYSICAL_MODEL_v2.h5"))
 MODEL_RESULTS_FILE = str(DataFile("SUPIRFACTOR_RESULTS_ALL.tsv.gz"))
 MODEL_LOSSES_FILE = str(DataFile("SUPIRFACTOR_LOSSES_ALL.tsv.gz"))
 
-# Pseudotime TSV files keyed by (method, is_dewakss), value (file name, has_index)
+class PseudotimeFile(_typing.NamedTuple):
+    filename: str
+    has_index: bool
+
+
+class DecayConstantFile(_typing.NamedTuple):
+    filename: str
+    gene_column: str
+    halflife_column: _typing.Union[str, list]
+    excel_engine: _typing.Optional[str] = None
+
+
+# Pseudotime TSV files keyed by (method, is_dewakss)
 PSEUDOTIME_FILES = {
-    ('dpt', False): (str(DataFile("2021_RAPA_TIMECOURSE_DPT.tsv.gz")), True),
-    ('cellrank', False): (str(DataFile("2021_RAPA_TIMECOURSE_CELLRANK.tsv.gz")), True),
-    ('monocle', False): (str(DataFile("2021_RAPA_TIMECOURSE_MONOCLE.tsv.gz")), False),
-    ('palantir', False): (str(DataFile("2021_RAPA_TIMECOURSE_PALANTIR.tsv.gz")), True),
-    ('dpt', True): (str(DataFile("2021_RAPA_TIMECOURSE_DPT_DEWAKSS.tsv.gz")), True),
-    ('cellrank', True): (str(DataFile("2021_RAPA_TIMECOURSE_CELLRANK_DEWAKSS.tsv.gz")), True),
-    ('monocle', True): (str(DataFile("2021_RAPA_TIMECOURSE_MONOCLE_DEWAKSS.tsv.gz")), False),
-    ('palantir', True): (str(DataFile("2021_RAPA_TIMECOURSE_PALANTIR_DEWAKSS.tsv.gz")), True)
+    ('dpt', False): PseudotimeFile(str(DataFile("2021_RAPA_TIMECOURSE_DPT.tsv.gz")), True),
+    ('cellrank', False): PseudotimeFile(str(DataFile("2021_RAPA_TIMECOURSE_CELLRANK.tsv.gz")), True),
+    ('monocle', False): PseudotimeFile(str(DataFile("2021_RAPA_TIMECOURSE_MONOCLE.tsv.gz")), False),
+    ('palantir', False): PseudotimeFile(str(DataFile("2021_RAPA_TIMECOURSE_PALANTIR.tsv.gz")), True),
+    ('dpt', True): PseudotimeFile(str(DataFile("2021_RAPA_TIMECOURSE_DPT_DEWAKSS.tsv.gz")), True),
+    ('cellrank', True): PseudotimeFile(str(DataFile("2021_RAPA_TIMECOURSE_CELLRANK_DEWAKSS.tsv.gz")), True),
+    ('monocle', True): PseudotimeFile(str(DataFile("2021_RAPA_TIMECOURSE_MONOCLE_DEWAKSS.tsv.gz")), False),
+    ('palantir', True): PseudotimeFile(str(DataFile("2021_RAPA_TIMECOURSE_PALANTIR_DEWAKSS.tsv.gz")), True)
 }
 
-# Existing decay constant data files
-# {DataSet: (File type, Gene Column, Half-life Column, Excel loading engine)}
+# Existing decay constant data files keyed by DataSet
 DECAY_CONSTANT_FILES = {
-    'Neymotin2014': ('tsv', "Syst", "thalf", None),
-    'Chan2018': ('tsv', "gene_id", ["halflife_160412_r1", "halflife_160412_r2"], None),
-    'Geisberg2014': ('tsv', "systematic_name", "halflife", None),
-    'Munchel2011': ('tsv', "Systematic Name", "Half-life [min]", None),
-    'Miller2011': ('tsv', "X1", "wt", None)
+    'Neymotin2014': DecayConstantFile(str(DataFile("Neymotin2014.tsv")), "Syst", "thalf"),
+    'Chan2018': DecayConstantFile(str(DataFile("Chan2018.tsv")), "gene_id", ["halflife_160412_r1", "halflife_160412_r2"]),
+    'Geisberg2014': DecayConstantFile(str(DataFile("Geisberg2014.tsv")), "systematic_name", "halflife"),
+    'Munchel2011': DecayConstantFile(str(DataFile("Munchel2011.tsv")), "Systematic Name", "Half-life [min]"),
+    'Miller2011': DecayConstantFile(str(DataFile("Miller2011.tsv")), "X1", "wt")
 }
 
 DECAY_CONSTANT_LINKS = {
@@ -151,6 +164,11 @@ N_PCS = _np.arange(5, 115, 10)
 N_NEIGHBORS = _np.arange(20, 190, 10)
 N_COMPS = _np.array([5, 10, 15])
 
+# Freeze the shared search-space arrays so no consumer can mutate them
+for _arr in (N_PCS, N_NEIGHBORS, N_COMPS):
+    _arr.setflags(write=False)
+del _arr
+
 ## FIGURE CONSTANTS ##
 FIGURE_1A_MINMAX = 5
 FIGURE_1A_LFC_THRESHOLD = _np.log2(1.25)
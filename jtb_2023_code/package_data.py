@@ -1,15 +1,34 @@
 import gc
 import argparse
 
+from concurrent.futures import ThreadPoolExecutor
+
 import anndata as ad
+import h5py
 import numpy as np
+import pandas as pd
 import scanpy as sc
 import scipy.sparse as sps
 
+from anndata.experimental import read_elem
+
 from jtb_2023_code.utils.figure_filenames import parse_file_path_command_line
 from scself import standardize_data
 
 
+# Dense per-experiment layers assembled by the packager
+_EXPT_LAYERS = (
+    "denoised",
+    "rapamycin_velocity",
+    "cell_cycle_velocity",
+    "rapamycin_transcription",
+    "cell_cycle_transcription",
+)
+
+# Row chunking for the HDF5 layer datasets
+_H5_ROW_CHUNK = 4096
+
+
 def main():
     parse_file_path_command_line()
 
@@ -34,46 +53,83 @@ def main():
 def package_data(out_file):
     from jtb_2023_code.utils.figure_data import FigureSingleCellData
 
-    data = FigureSingleCellData()
+    data = FigureSingleCellData(load_data=False)
 
     _data_packager(data, out_file)
 
 
-def _data_packager(data, out_file=None):
-
-    print("Creating new data object from counts")
-    _all = data.all_data
-
-    inf_data = ad.AnnData(
-        _all.layers["counts"].copy(),
-        obs=_all.obs,
-        var=_all.var[["CommonName", "category", "programs", 'RP', 'RiBi']]
+def _new_data_object(filename):
+    """
+    Build the packaging AnnData by pulling only the elements it needs
+    (counts and decay layers, obs, var columns, UMAP/PCA coordinates,
+    and the program keys) out of the processed h5ad with read_elem,
+    instead of reading the whole object into memory
+    """
+
+    with h5py.File(filename, "r") as f:
+        # Take the counts directly as X; they stay a sparse csr_matrix
+        inf_data = ad.AnnData(
+            read_elem(f["layers/counts"]),
+            obs=read_elem(f["obs"]),
+            var=read_elem(f["var"])[
+                ["CommonName", "category", "programs", 'RP', 'RiBi']
+            ]
+        )
+
+        inf_data.layers["decay_constants"] = read_elem(
+            f["layers/decay_constants"]
+        )
+
+        _coords = np.hstack((
+            read_elem(f["obsm/X_umap"])[:, 0:2],
+            read_elem(f["obsm/X_pca"])[:, 0:2]
+        ))
+
+        _rapa_program = read_elem(f["uns/programs/rapa_program"])
+        _cc_program = read_elem(f["uns/programs/cell_cycle_program"])
+
+    # Add the embedding coordinates and the program time copies with a
+    # single concat instead of reindexing obs once per assignment
+    inf_data.obs = pd.concat(
+        (
+            inf_data.obs,
+            pd.DataFrame(
+                _coords,
+                index=inf_data.obs.index,
+                columns=["UMAP_1", "UMAP_2", "PCA_1", "PCA_2"]
+            ),
+            inf_data.obs[[
+                f"program_{_rapa_program}_time",
+                f"program_{_cc_program}_time"
+            ]].set_axis(
+                ["program_rapa_time", "program_cc_time"],
+                axis=1
+            )
+        ),
+        axis=1
     )
 
-    inf_data.layers["decay_constants"] = _all.layers["decay_constants"]
+    return inf_data
 
-    inf_data.obs[["UMAP_1", "UMAP_2"]] = _all.obsm["X_umap"][:, 0:2]
-    inf_data.obs[["PCA_1", "PCA_2"]] = _all.obsm["X_pca"][:, 0:2]
 
-    # Copy cell cycle time to main object
-    inf_data.obs["program_rapa_time"] = inf_data.obs[
-        f'program_{_all.uns["programs"]["rapa_program"]}_time'
-    ]
-    inf_data.obs["program_cc_time"] = inf_data.obs[
-        f'program_{_all.uns["programs"]["cell_cycle_program"]}_time'
-    ]
+def _data_packager(data, out_file=None):
+    # Deferred so figure_constants resolves its file paths after the
+    # command line set_path() calls, like the other entry points
+    from jtb_2023_code.figure_constants import VERBOSE
 
-    obs_names = {
-        k: data.expt_data[k].obs_names.copy()
-        for k in data.expts
-    }
+    print("Creating new data object from counts")
+    inf_data = _new_data_object(data.all_data_file)
 
-    # Free memory used by all that count data and whatnot
-    data._unload()
+    # Free memory used by all that count data and whatnot,
+    # if the caller had it loaded
+    if data.all_data is not None:
+        data._unload()
 
     print("Creating decay & velocity layers")
 
-    inf_data.layers["counts"] = inf_data.X.copy()
+    # astype() allocates a new matrix for X, so the counts layer can
+    # hold the original without a defensive copy
+    inf_data.layers["counts"] = inf_data.X
     inf_data.X = inf_data.X.astype(np.float32)
 
     standardize_data(
@@ -83,70 +139,208 @@ def _data_packager(data, out_file=None):
         subset_genes_for_depth=~(inf_data.var['RP'] | inf_data.var['RiBi'])
     )
 
-    # Copy decay constants and velocity from the calculated data objects
-    inf_data.layers["rapamycin_velocity"] = np.full(
-        inf_data.X.shape, np.nan, dtype=np.float32
-    )
-    inf_data.layers["cell_cycle_velocity"] = np.full(
-        inf_data.X.shape, np.nan, dtype=np.float32
-    )
-    inf_data.layers["denoised"] = np.full(
-        inf_data.X.shape,
-        np.nan,
-        dtype=np.float32
+    # Sort observations so each experiment is a contiguous block of rows
+    # and the experiment layers can be copied in without a NaN prefill.
+    # Experiments partition the observations, so a single groupby yields
+    # the positional rows for every experiment
+    # Only the WT observations are packaged, so subset before any layer
+    # assembly and never extract or copy the fpr1 blocks at all
+    _wt_expts = [k for k in data.expts if k[1] == "WT"]
+
+    _obs_groups = inf_data.obs.groupby(["Experiment", "Gene"]).indices
+    _expt_rows = {k: _obs_groups[k] for k in _wt_expts}
+    _covered_rows = np.concatenate([_expt_rows[k] for k in _wt_expts])
+
+    print(
+        f"{len(_covered_rows)} observations kept (WT) "
+        f"from {inf_data.X.shape} data"
     )
 
-    for k in data.expts:
-        _expt_idx = inf_data.obs_names.isin(obs_names[k])
+    # Subset in place so the unfiltered object is released immediately,
+    # rather than materializing a view copy alongside it
+    inf_data._inplace_subset_obs(_covered_rows)
 
-        print(f"Processing experiment {k} ({np.sum(_expt_idx)} observations)")
+    _expt_slices = {}
+    _slice_start = 0
+    for k in _wt_expts:
+        _expt_slices[k] = slice(
+            _slice_start, _slice_start + len(_expt_rows[k])
+        )
+        _slice_start = _expt_slices[k].stop
 
-        _dnd = data.denoised_data(*k).X
-        if sps.issparse(_dnd):
-            _dnd = _dnd.A
+    if out_file is not None:
+        return _stream_layers(data, inf_data, _expt_slices, out_file)
 
-        inf_data.layers["denoised"][_expt_idx, :] = _dnd
-        del _dnd
+    _assemble_layers(data, inf_data, _expt_slices)
 
-        dd = data.decay_data(*k)
-        inf_data.layers["rapamycin_velocity"][_expt_idx, :] = dd.layers[
-            "rapamycin_velocity"
-        ]
-        inf_data.layers["cell_cycle_velocity"][_expt_idx, :] = dd.layers[
-            "cell_cycle_velocity"
-        ]
-        del dd
+    if VERBOSE:
+        for _layer in _EXPT_LAYERS + ("decay_constants",):
+            print(
+                f"{_layer} NaN: "
+                f"{np.count_nonzero(np.isnan(inf_data.layers[_layer]))}"
+            )
 
-        print(f"Experiment extraction complete [GC: {gc.collect()}]")
+    return inf_data
 
-    _wt_idx = inf_data.obs["Gene"] == "WT"
 
-    print(
-        f"{_wt_idx.sum()} observations kept (WT) "
-        f"from {inf_data.X.shape} data"
-    )
+def _expt_layer_blocks(data, k, decay_constants):
+    """
+    Load the denoised and velocity blocks for one experiment and compute
+    the transcription rate blocks (alpha = dX/dt + lambda * X) fused
+    in-place so the only allocation is the output block
+    """
 
-    inf_data = inf_data[_wt_idx, :].copy()
+    _dnd = data.denoised_data(*k).X
+    if sps.issparse(_dnd):
+        _dnd = _dnd.A
 
-    print(
-        f"Denoised NaN: {np.sum(np.isnan(inf_data.layers['denoised']))}"
-    )
-    print(
-        "Rapamycin Velocity NaN: "
-        f"{np.sum(np.isnan(inf_data.layers['rapamycin_velocity']))}"
-    )
-    print(
-        "Velocity NaN: "
-        f"{np.sum(np.isnan(inf_data.layers['cell_cycle_velocity']))}"
-    )
-    print(
-        "Cell Cycle Decay NaN: "
-        f"{np.sum(np.isnan(inf_data.layers['decay_constants']))}"
-    )
+    dd = data.decay_data(*k)
+    _blocks = {
+        "denoised": _dnd,
+        "rapamycin_velocity": dd.layers["rapamycin_velocity"],
+        "cell_cycle_velocity": dd.layers["cell_cycle_velocity"],
+    }
+    del dd
+
+    for _velo_layer, _out_layer in (
+        ("rapamycin_velocity", "rapamycin_transcription"),
+        ("cell_cycle_velocity", "cell_cycle_transcription"),
+    ):
+        _transcription = np.multiply(decay_constants, _dnd)
+        np.add(
+            _blocks[_velo_layer],
+            _transcription,
+            out=_transcription
+        )
+        _blocks[_out_layer] = _transcription
+        del _transcription
+
+    return _blocks
+
+
+def _iter_expt_blocks(data, inf_data, expt_slices):
+    """
+    Yield (experiment key, row slice, layer blocks) per experiment,
+    prefetching the next experiment's blocks on a worker thread while
+    the caller writes the current one. Threads share the process heap,
+    so no shared-memory buffers are needed; a single worker bounds peak
+    memory to two experiments' blocks
+    """
+
+    _expts = list(expt_slices.keys())
+
+    def _load(k):
+        return _expt_layer_blocks(
+            data,
+            k,
+            inf_data.layers["decay_constants"][expt_slices[k], :]
+        )
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        _next_blocks = pool.submit(_load, _expts[0])
+
+        for i, k in enumerate(_expts):
+            _blocks = _next_blocks.result()
+
+            if i + 1 < len(_expts):
+                _next_blocks = pool.submit(_load, _expts[i + 1])
+
+            yield k, expt_slices[k], _blocks
+
+
+def _assemble_layers(data, inf_data, expt_slices):
+    """
+    Assemble the dense experiment layers in memory, copying each
+    experiment into its contiguous row block
+    """
+
+    for _layer in _EXPT_LAYERS:
+        inf_data.layers[_layer] = np.empty(
+            inf_data.X.shape, dtype=np.float32
+        )
+
+    for k, _expt_slice, _blocks in _iter_expt_blocks(
+        data, inf_data, expt_slices
+    ):
+        print(
+            f"Processing experiment {k} "
+            f"({_expt_slice.stop - _expt_slice.start} observations)"
+        )
+
+        for _layer, _block in _blocks.items():
+            inf_data.layers[_layer][_expt_slice, :] = _block
+
+        del _blocks
 
-    if out_file is not None:
-        print(f"Writing data {inf_data.shape} to {out_file}")
-        inf_data.write(out_file)
+        print(f"Experiment extraction complete [GC: {gc.collect()}]")
+
+
+def _stream_layers(data, inf_data, expt_slices, out_file):
+    """
+    Write the packaged object, then stream each experiment's dense layer
+    blocks straight into the h5ad layers group, so no dense layer is
+    ever fully resident in memory
+    """
+
+    from jtb_2023_code.figure_constants import VERBOSE
+
+    _n, _g = inf_data.shape
+
+    # Store the decay constants at half precision; they are bounded
+    # well within float16 range and only feed plotting downstream
+    inf_data.layers["decay_constants"] = inf_data.layers[
+        "decay_constants"
+    ].astype(np.float16)
+
+    print(f"Writing data {inf_data.shape} to {out_file}")
+    inf_data.write(out_file, compression="gzip")
+
+    _nan_counts = {_layer: 0 for _layer in _EXPT_LAYERS}
+
+    with h5py.File(out_file, "a") as f:
+        for _layer in _EXPT_LAYERS:
+            # float16 storage; blocks are computed in float32 and h5py
+            # downcasts them on assignment
+            _dataset = f["layers"].create_dataset(
+                _layer,
+                shape=(_n, _g),
+                dtype="f2",
+                chunks=(min(_H5_ROW_CHUNK, _n), _g),
+                compression="gzip",
+            )
+
+            # Attrs anndata needs to read the dataset back as a layer
+            _dataset.attrs["encoding-type"] = "array"
+            _dataset.attrs["encoding-version"] = "0.2.0"
+
+        for k, _expt_slice, _blocks in _iter_expt_blocks(
+            data, inf_data, expt_slices
+        ):
+            print(
+                f"Processing experiment {k} "
+                f"({_expt_slice.stop - _expt_slice.start} observations)"
+            )
+
+            for _layer, _block in _blocks.items():
+                f["layers"][_layer][_expt_slice, :] = _block
+
+                if VERBOSE:
+                    _nan_counts[_layer] += np.count_nonzero(
+                        np.isnan(_block)
+                    )
+
+            del _blocks
+
+            print(f"Experiment extraction complete [GC: {gc.collect()}]")
+
+    if VERBOSE:
+        for _layer, _count in _nan_counts.items():
+            print(f"{_layer} NaN: {_count}")
+
+        print(
+            "decay_constants NaN: "
+            f"{np.count_nonzero(np.isnan(inf_data.layers['decay_constants']))}"
+        )
 
     return inf_data
 
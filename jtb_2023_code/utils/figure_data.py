@@ -57,7 +57,7 @@ from .decay_common import (
 
 from .velocity_common import calculate_velocities
 from .pseudotime_common import spearman_rho_pools, get_pca_pt
-from .process_published_data import process_all_decay_links
+from .process_published_data import process_all_decay_links, read_tsv
 from sklearn.metrics import pairwise_distances
 
 NO_RP_DEPTH = 2000
@@ -96,6 +96,9 @@ class FigureSingleCellData:
 
     @property
     def expts(self):
+        if self._expt_keys is None:
+            self._expt_keys = [k for k in self.expt_files]
+
         return self._expt_keys
 
     @property
@@ -156,8 +159,12 @@ class FigureSingleCellData:
     def _all_adatas(self):
         return [self.all_data] + [v for k, v in self.expt_data.items()]
 
-    def __init__(self, start_from_scratch=False, load_expts=True):
-        self._load(from_unprocessed=start_from_scratch, load_expts=load_expts)
+    def __init__(self, start_from_scratch=False, load_expts=True, load_data=True):
+        if load_data:
+            self._load(
+                from_unprocessed=start_from_scratch,
+                load_expts=load_expts
+            )
 
     def do_projections(self):
         if not self.has_pca:
@@ -232,6 +239,12 @@ class FigureSingleCellData:
             )
             self.save()
 
+    def _ensure_loaded(self):
+        # Regenerating derived data needs the full object; load it if
+        # this instance skipped loading at construction or was unloaded
+        if self._all_data is None or self._expt_data is None:
+            self._load()
+
     def _unload(self):
         del self._all_data
         del self._expt_data
@@ -310,8 +323,11 @@ class FigureSingleCellData:
             # LOAD FLATFILES #
             print("Loading pseudotime flatfiles")
             loaded_data = [
-                _pd.read_csv(fn, sep="\t", index_col=0 if has_idx else None)
-                for k, (fn, has_idx) in PSEUDOTIME_FILES.items()
+                read_tsv(
+                    v.filename,
+                    index_col=0 if v.has_index else None
+                )
+                for v in PSEUDOTIME_FILES.values()
             ]
 
             for i, k in enumerate(PSEUDOTIME_FILES.keys()):
@@ -453,6 +469,8 @@ class FigureSingleCellData:
         else:
             print(f"{_fn} not found. Generating velocity data:")
 
+            self._ensure_loaded()
+
             _eref = self.expt_data[(expt, gene)]
 
             # Reset the obs data
@@ -475,6 +493,7 @@ class FigureSingleCellData:
         _velo_data = self.velocity_data(expt, gene)
 
         if "programs" not in _velo_data.uns:
+            self._ensure_loaded()
             self._transfer_programs(_velo_data)
             _fn = RAPA_SINGLE_CELL_VELOCITY_BY_EXPT.format(e=expt, g=gene)
 
@@ -486,6 +505,8 @@ class FigureSingleCellData:
         if "cell_cycle_decay" not in _velo_data.var.columns or recalculate:
             print("Calculating Biophysical Paramaters:")
 
+            self._ensure_loaded()
+
             for g_key, time_key, tmin, tmax in [
                 ("cell_cycle", CC_TIME_COL, 0, 88),
                 ("rapamycin", RAPA_TIME_COL, -10, 60),
@@ -650,6 +671,9 @@ class FigureSingleCellData:
 
         else:
             print(f"{_fn} not found. Generating denoised data:")
+
+            self._ensure_loaded()
+
             adata = _ad.AnnData(
                 self.expt_data[(expt, gene)].layers["counts"].copy(),
                 obs=self.expt_data[(expt, gene)].obs.copy(),
@@ -701,18 +725,22 @@ class FigureSingleCellData:
         # Copy counts and save basic count depth stats
         adata.layers["counts"] = adata.X.copy()
 
-        _adata_obs_sum = adata.X.sum(axis=1).astype(int)
-        _adata_obs_n = adata.X.astype(bool).sum(axis=1)
-        _adata_var_sum = adata.X.sum(axis=0).astype(int)
-
+        # np.asarray(...).ravel() flattens both the np.matrix sums that
+        # sparse X returns and plain ndarray sums, replacing the
+        # .A1 try/except
+        adata.obs["n_counts"] = _np.asarray(
+            adata.X.sum(axis=1)
+        ).ravel().astype(int)
+        adata.var["n_counts"] = _np.asarray(
+            adata.X.sum(axis=0)
+        ).ravel().astype(int)
+
+        # Count expressed genes from the sparsity structure instead of
+        # materializing a full boolean copy of X
         try:
-            adata.obs["n_counts"] = _adata_obs_sum.A1
-            adata.var["n_counts"] = _adata_var_sum.A1
-            adata.obs["n_genes"] = _adata_obs_n.A1
+            adata.obs["n_genes"] = adata.X.getnnz(axis=1)
         except AttributeError:
-            adata.obs["n_counts"] = _adata_obs_sum
-            adata.var["n_counts"] = _adata_var_sum
-            adata.obs["n_genes"] = _adata_obs_n
+            adata.obs["n_genes"] = _np.count_nonzero(adata.X, axis=1)
 
         # Fix categorical dtypes
         adata.obs["Pool"] = adata.obs["Pool"].astype("category")
@@ -1080,7 +1108,9 @@ def _call_cc(data):
         cc_prop = _np.zeros((data.shape[0], len(CC_COLS)), order="F")
         for i, cc in enumerate(CC_COLS):
             cc_prop[:, i] = (
-                data.layers["counts"][:, data.var[cc].values].sum(axis=1).A1
+                _np.asarray(
+                    data.layers["counts"][:, data.var[cc].values].sum(axis=1)
+                ).ravel()
                 / data.obs["n_counts"].values
             )
 
@@ -1101,9 +1131,9 @@ def calc_group_props(data, cols=AGG_COLS):
             print(f"Calculating aggregate proportion {cols}")
         for i, ag in enumerate(cols):
             data.obs[ag] = (
-                data.layers["counts"][:, data.var[ag].values]
-                .sum(axis=1)
-                .A1.astype(float)
+                _np.asarray(
+                    data.layers["counts"][:, data.var[ag].values].sum(axis=1)
+                ).ravel().astype(float)
                 / data.obs["n_counts"].values
             )
 
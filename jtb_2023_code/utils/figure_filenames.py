@@ -16,14 +16,22 @@ class _FilePathAdjustableRoot:
 
     def __init__(self, filename):
         self._filename = _os.path.expanduser(filename)
+        self._resolved = None
 
     def __str__(self):
-        if _os.path.isabs(self._filename):
-            return self._filename
-        else:
-            return _os.path.abspath(
-                _os.path.join(self._path_root, self._filename)
-            )
+        # Cache the resolved path; rebuild it if set_path() has changed
+        # the class path root since it was resolved
+        if self._resolved is None or self._resolved[0] is not self._path_root:
+            if _os.path.isabs(self._filename):
+                _path = self._filename
+            else:
+                _path = _os.path.abspath(
+                    _os.path.join(self._path_root, self._filename)
+                )
+
+            self._resolved = (self._path_root, _path)
+
+        return self._resolved[1]
 
 
 class DataFile(_FilePathAdjustableRoot):
@@ -71,15 +71,18 @@ def predict_all(
 
     print("Predicting From Count Model")
 
+    _count_predicts = predict_from_model(
+        count_model,
+        model_data,
+        untreated_only=untreated_only,
+        n_predicts=n_predicts,
+    )
+
     predicts = _initialize_adata(
         np.multiply(
-            predict_from_model(
-                count_model,
-                model_data,
-                untreated_only=untreated_only,
-                n_predicts=n_predicts,
-            ),
+            _count_predicts,
             _count_scaler[None, None, :],
+            out=_count_predicts,
         ).reshape(-1, g),
         model_data,
         untreated_only=untreated_only,
@@ -87,6 +90,8 @@ def predict_all(
         predict_times=predict_times,
     )
 
+    del _count_predicts
+
     predicts.var['count_scale'] = _count_scaler
     predicts.var['velocity_scale'] = _velo_scaler
 
@@ -103,11 +108,13 @@ def predict_all(
     predicts.layers["velocity_predict_counts"] = np.multiply(
         _velo_predicts[1],
         _count_scaler[None, None, :],
+        out=_velo_predicts[1],
     ).reshape(-1, g)
 
     predicts.layers["velocity_predict_velocity"] = np.multiply(
         _velo_predicts[0],
         _velo_scaler[None, None, :],
+        out=_velo_predicts[0],
     ).reshape(-1, g)
 
     del _velo_predicts
@@ -136,14 +143,17 @@ def predict_biophysics(
     _velo_scaler = biophysics_model._velocity_inverse_scaler.numpy()
     g = model_data.shape[1]
    
+    _velo_predict = predict_from_model(
+        biophysics_model,
+        model_data,
+        untreated_only=untreated_only,
+        n_predicts=n_predicts,
+    )[0]
+
     _velo_predict = np.multiply(
-        predict_from_model(
-            biophysics_model,
-            model_data,
-            untreated_only=untreated_only,
-            n_predicts=n_predicts,
-        )[0],
+        _velo_predict,
         _velo_scaler[None, None, :],
+        out=_velo_predict
     ).reshape(-1, g)
 
     if predicts is None:
@@ -169,20 +179,22 @@ def predict_biophysics(
         n_predicts=n_predicts,
     )
 
+    # Rescale in place; the prediction arrays are freshly allocated, so
+    # out= just avoids a second full-size temporary per layer
     predicts.layers["biophysical_predict_transcription"] = np.multiply(
-        _sub_predicts[0], _velo_scaler[None, None, :]
+        _sub_predicts[0], _velo_scaler[None, None, :], out=_sub_predicts[0]
     ).reshape(-1, g)
 
     predicts.layers["biophysical_predict_decay"] = np.multiply(
-        _sub_predicts[1], _velo_scaler[None, None, :]
+        _sub_predicts[1], _velo_scaler[None, None, :], out=_sub_predicts[1]
     ).reshape(-1, g)
 
     predicts.layers["biophysical_predict_counts"] = np.multiply(
-        counts, _count_scaler[None, None, :]
+        counts, _count_scaler[None, None, :], out=counts
     ).reshape(-1, g)
 
     predicts.layers["biophysical_predict_decay_constant"] = np.divide(
-        decays, _count_scaler[None, None, :]
+        decays, _count_scaler[None, None, :], out=decays
     ).reshape(-1, g)
 
     predicts.obsm["biophysical_predict_tfa"] = tfa.reshape(-1, tfa.shape[-1])
@@ -1,12 +1,53 @@
+import os
+import shutil
+import subprocess
+
 import pandas as pd
 
 from ..figure_constants import (
     DECAY_CONSTANT_FILES,
-    DECAY_CONSTANT_LINKS,
-    DataFile
+    DECAY_CONSTANT_LINKS
 )
 
 
+def read_tsv(filename, **kwargs):
+    """
+    Read a TSV file with pandas, piping .gz files through pigz or zcat
+    when one is on the PATH instead of inflating them with the slower
+    python gzip module
+    """
+    kwargs.setdefault("sep", "\t")
+
+    if filename.endswith(".gz"):
+        for _unzip in (["pigz", "-dc"], ["zcat"]):
+            if shutil.which(_unzip[0]) is None:
+                continue
+
+            # A missing file would otherwise surface as a pandas
+            # EmptyDataError from the dead pipe
+            if not os.path.isfile(filename):
+                raise FileNotFoundError(filename)
+
+            with subprocess.Popen(
+                _unzip + [filename],
+                stdout=subprocess.PIPE
+            ) as _proc:
+                df = pd.read_csv(_proc.stdout, **kwargs)
+
+                # A truncated or corrupt .gz kills the decompressor
+                # mid-stream and pandas would silently return a partial
+                # frame; fail like the python gzip reader does
+                if _proc.wait() != 0:
+                    raise RuntimeError(
+                        f"{_unzip[0]} exited with status "
+                        f"{_proc.returncode} decompressing {filename}"
+                    )
+
+                return df
+
+    return pd.read_csv(filename, **kwargs)
+
+
 def process_all_decay_links(genes):
     return pd.concat(
         [
@@ -17,12 +58,15 @@ def process_all_decay_links(genes):
 
 
 def _process_link(genes, dataset):
-    file_type, gene_col, hl_col, _ = DECAY_CONSTANT_FILES[dataset]
+    _record = DECAY_CONSTANT_FILES[dataset]
+    gene_col = _record.gene_column
 
-    f = str(DataFile(f"{dataset}.{file_type}"))
-    df = pd.read_csv(f, sep="\t", index_col=0 if gene_col == "X1" else None)
+    df = read_tsv(
+        _record.filename,
+        index_col=0 if gene_col == "X1" else None
+    )
 
-    df, hl_col = _process_df_hl(df, genes, gene_col, hl_col)
+    df, hl_col = _process_df_hl(df, genes, gene_col, _record.halflife_column)
     df.rename({hl_col: dataset}, axis=1, inplace=True)
 
     return df[[dataset]]